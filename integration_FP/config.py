@@ -8,24 +8,19 @@ ticker = "CRDA.L"
 # Dynamically read statistics from Excel based on poa_input
 stats = read_summary_from_excel(excel_file_path, ticker, poa_input)
 
+def build_company(stats: dict) -> dict:
+    """Map read_summary_from_excel stats onto the triangular inputs used by simulate."""
+    return {
+        key: {
+            "median": stats[key]["median"],
+            "0th": stats[key]["p10"],
+            "100th": stats[key]["p90"]
+        }
+        for key in ("Revenue", "EBITDA_Margin", "EV_EBITDA")
+    }
+
 companies = {
-    "Client": {
-        "Revenue": {
-            "median": stats["Revenue"]["median"],
-            "0th": stats["Revenue"]["p10"],
-            "100th": stats["Revenue"]["p90"]
-        },
-        "EBITDA_Margin": {
-            "median": stats["EBITDA_Margin"]["median"],
-            "0th": stats["EBITDA_Margin"]["p10"],
-            "100th": stats["EBITDA_Margin"]["p90"]
-        },
-        "EV_EBITDA": {
-            "median": stats["EV_EBITDA"]["median"],
-            "0th": stats["EV_EBITDA"]["p10"],
-            "100th": stats["EV_EBITDA"]["p90"]
-        },
-    },
+    "Client": build_company(stats),
 }
 
 base = {
@@ -1,9 +1,15 @@
 import pandas as pd
 import numpy as np
+from functools import lru_cache
+
+@lru_cache(maxsize=8)
+def _load_sheet(excel_file_path):
+    # Parse the workbook once per path; every ticker/year lookup scans the same sheet
+    return pd.read_excel(excel_file_path, header=None, engine='openpyxl')
 
 def read_summary_from_excel(excel_file_path, ticker, poa_input):
     # Load without header
-    df = pd.read_excel(excel_file_path, header=None, engine='openpyxl')
+    df = _load_sheet(excel_file_path)
     
     summary_header = f"Summary Statistics - {ticker}"
     start_row = df[df.iloc[:, 0] == summary_header].index
@@ -0,0 +1,174 @@
+# result_server.py
+import argparse
+import asyncio
+import json
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from read_summary import read_summary_from_excel
+from run_analysis import load_bases, simulate_horizon
+from src.goals import find_equal_p
+from src.monte_carlo import SAMPLERS, check_company_data
+from src.tsr import horizon_base
+
+
+class ResultServer:
+    """
+    Long-running goal-seek service. Summary stats and recent simulations stay in
+    memory; new simulations run in a process pool and workbook reads in a thread,
+    so queries never block on them. `n` per request is capped at `max_n`.
+
+        GET /thresholds?ticker=CRDA.L&poa=CY2026&p=0.8,0.5,0.2[&n=10000&seed=1&sampler=lhs]
+        GET /health
+    """
+
+    def __init__(self, excel_file_path: str, bases: dict, build_company, n_simulations: int,
+                 workers: int | None = None, cache_size: int = 16, max_n: int = 1_000_000):
+        self.excel_file_path = excel_file_path
+        self.bases = bases
+        self.build_company = build_company
+        self.n_simulations = n_simulations
+        self.max_n = max_n
+        self.cache_size = cache_size
+        self.pool = ProcessPoolExecutor(max_workers=workers)
+        self.companies = {}
+        # (ticker, poa, n, seed, sampler) -> (draws, base, years), most recent last
+        self.simulations = OrderedDict()
+        self.pending = {}
+
+    def company(self, ticker: str, poa: str) -> dict:
+        key = (ticker, poa)
+        if key not in self.companies:
+            stats = read_summary_from_excel(self.excel_file_path, ticker, poa)
+            company_data = self.build_company(stats)
+            check_company_data(company_data, f"{ticker} {poa}")
+            self.companies[key] = company_data
+        return self.companies[key]
+
+    async def _simulate(self, ticker: str, poa: str, n: int, seed, sampler: str):
+        company = await asyncio.to_thread(self.company, ticker, poa)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self.pool, simulate_horizon, company, self.bases[ticker], int(poa[2:]), n, seed, sampler
+        )
+
+    async def simulation(self, ticker: str, poa: str, n: int, seed, sampler: str):
+        key = (ticker, poa, n, seed, sampler)
+        if key in self.simulations:
+            self.simulations.move_to_end(key)
+            return self.simulations[key]
+        # Concurrent requests for the same simulation share one pool job
+        if key not in self.pending:
+            if ticker not in self.bases:
+                raise ValueError(f"No base inputs for {ticker}")
+            horizon_base(self.bases[ticker], int(poa[2:]))
+            self.pending[key] = asyncio.ensure_future(self._simulate(ticker, poa, n, seed, sampler))
+        try:
+            result = await self.pending[key]
+        finally:
+            self.pending.pop(key, None)
+        self.simulations[key] = result
+        while len(self.simulations) > self.cache_size:
+            self.simulations.popitem(last=False)
+        return result
+
+    async def thresholds(self, query: dict) -> str:
+        def param(name, default=None):
+            return query.get(name, [default])[0]
+
+        ticker = param("ticker")
+        if not ticker:
+            raise ValueError("'ticker' is required")
+        poa = param("poa", "CY2026")
+        probs = [float(p) for p in param("p", "0.8,0.5,0.2").split(",")]
+        if not all(0 <= p <= 1 for p in probs):
+            raise ValueError("'p' values must be between 0 and 1")
+        n = int(param("n", self.n_simulations))
+        if not 0 < n <= self.max_n:
+            raise ValueError(f"'n' must be between 1 and {self.max_n}")
+        seed = param("seed")
+        seed = None if seed is None else int(seed)
+        sampler = param("sampler", "random")
+        if sampler not in SAMPLERS:
+            raise ValueError(f"Unknown sampler '{sampler}', expected one of {SAMPLERS}")
+
+        draws, base, years = await self.simulation(ticker, poa, n, seed, sampler)
+        table = await asyncio.to_thread(find_equal_p, draws, base, years, probs)
+        return table.reset_index().to_json(orient="records")
+
+    async def route(self, method: str, target: str) -> tuple[HTTPStatus, str]:
+        url = urlsplit(target)
+        if method != "GET":
+            return HTTPStatus.METHOD_NOT_ALLOWED, json.dumps({"error": f"{method} not supported"})
+        if url.path == "/health":
+            return HTTPStatus.OK, json.dumps({"cached_simulations": len(self.simulations)})
+        if url.path == "/thresholds":
+            return HTTPStatus.OK, await self.thresholds(parse_qs(url.query))
+        return HTTPStatus.NOT_FOUND, json.dumps({"error": f"Unknown path {url.path}"})
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = (await reader.readline()).decode("latin-1").split()
+            # Headers are not used; read past them
+            while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                pass
+            if len(request_line) < 2:
+                status, body = HTTPStatus.BAD_REQUEST, json.dumps({"error": "Malformed request"})
+            else:
+                status, body = await self.route(request_line[0], request_line[1])
+        except ValueError as exc:
+            status, body = HTTPStatus.BAD_REQUEST, json.dumps({"error": str(exc)})
+        except Exception as exc:
+            status, body = HTTPStatus.INTERNAL_SERVER_ERROR, json.dumps({"error": repr(exc)})
+
+        payload = body.encode()
+        writer.write(
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(payload)}\r\n"
+            "Connection: close\r\n\r\n".encode() + payload
+        )
+        await writer.drain()
+        writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 8765, unix_path: str | None = None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle, path=unix_path)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        print(f"Serving on {unix_path or f'http://{host}:{port}'}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown(cancel_futures=True)
+
+
+def main(argv=None):
+    # config reads the default workbook on import, so only load it once we need the defaults
+    import config
+
+    parser = argparse.ArgumentParser(description="Serve goal-seek thresholds from warm simulations.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", default=None, help="Listen on a Unix socket instead of TCP")
+    parser.add_argument("--excel", default=config.excel_file_path)
+    parser.add_argument("--bases", default=None,
+                        help="JSON file of {ticker: base} historical inputs (see config.base)")
+    parser.add_argument("-n", "--n-simulations", type=int, default=config.n_simulations)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--cache-size", type=int, default=16, help="Simulations kept in memory")
+    parser.add_argument("--max-n", type=int, default=1_000_000, help="Largest n a request may ask for")
+    args = parser.parse_args(argv)
+
+    server = ResultServer(args.excel, load_bases(config, args.bases), config.build_company, args.n_simulations,
+                          workers=args.workers, cache_size=args.cache_size, max_n=args.max_n)
+    try:
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,237 @@
 # run_analysis.py
-from config import companies, base, n_simulations
-from src.monte_carlo import simulate
-from src.tsr import compute_tsr
+import argparse
+import importlib.util
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from read_summary import read_summary_from_excel
+from src.monte_carlo import simulate, check_company_data, SAMPLERS
+from src.tsr import compute_tsr, horizon_base
 from src.goals import find_equal_p
+from src.store import simulate_to_store
+from src.kernels import simulate_tsr, BACKENDS
+from src.portfolio import simulate_portfolio_tsr, find_equal_p_portfolio
+from src.paths import simulate_paths, compute_path_tsr, find_equal_p_paths
 
-def main():
-    df = simulate(companies["Client"], n_simulations)
-    df = compute_tsr(df, base["Client"], base["Client"]["years"])
-    table = find_equal_p(df, base["Client"], base["Client"]["years"], tsr_probs=[0.8, 0.5, 0.2])
+FORMATS = ("csv", "parquet", "json")
+
+
+def simulate_horizon(company: dict, base: dict, year: int, n: int, seed, sampler: str,
+                     dtype: str = "float64", store_path: str | None = None, backend: str = "numpy"):
+    """Simulate one ticker/year with TSR; returns (draws, horizon base, years)."""
+    base, years = horizon_base(base, year)
+    if store_path:
+        draws = simulate_to_store(store_path, company, n, base, years, seed=seed,
+                                  sampler=sampler, dtype=dtype, backend=backend).draws
+    elif backend == "numba":
+        draws = simulate_tsr(company, base, years, n, seed=seed, backend=backend, dtype=dtype)
+    else:
+        rng = np.random.default_rng(seed)
+        draws = simulate(company, n, rng=rng, sampler=sampler, dtype=dtype)
+        draws = compute_tsr(draws, base, years)
+    return draws, base, years
+
+
+def run_job(company: dict, base: dict, year: int, n: int, seed, sampler: str, tsr_probs: list[float],
+            dtype: str = "float64", store_path: str | None = None, backend: str = "numpy"):
+    """Simulate one ticker/year and return its goal-seek table."""
+    draws, base, years = simulate_horizon(company, base, year, n, seed, sampler, dtype, store_path, backend)
+    return find_equal_p(draws, base, years, tsr_probs=tsr_probs)
+
+
+def run_paths_job(yearly_company: dict, base: dict, n: int, seed, tsr_probs: list[float],
+                  dtype: str = "float64", persistence: float = 0.9):
+    """Simulate one ticker's yearly paths and goal-seek every horizon."""
+    paths = simulate_paths(yearly_company, n, rng=np.random.default_rng(seed),
+                           persistence=persistence, dtype=dtype)
+    paths = compute_path_tsr(paths, base)
+    return find_equal_p_paths(paths, base, tsr_probs=tsr_probs)
+
+
+def run_portfolio(constituents: list, weights: list[float], n: int, seed, tsr_probs: list[float],
+                  correlation: float = 0.0, workers: int = 1, dtype: str = "float64",
+                  tickers: list[str] | None = None):
+    """Simulate the weighted portfolio TSR and goal-seek it, with per-name thresholds."""
+    portfolio_tsr = simulate_portfolio_tsr(constituents, weights, n, seed=seed, correlation=correlation,
+                                           workers=workers, dtype=dtype)
+    return find_equal_p_portfolio(portfolio_tsr, constituents, weights, tsr_probs=tsr_probs, tickers=tickers)
+
+
+def write_table(table, path: str, fmt: str):
+    if fmt == "csv":
+        table.to_csv(path)
+    elif fmt == "parquet":
+        table.to_parquet(path)
+    else:
+        table.reset_index().to_json(path, orient="records", indent=2)
+
+
+def load_bases(config, bases_file: str | None = None) -> dict:
+    """
+    Per-ticker base inputs. config.base["Client"] belongs to config.ticker, other
+    config.base entries are keyed by ticker, and a JSON file of {ticker: base}
+    overrides both.
+    """
+    bases = {t: b for t, b in config.base.items() if t != "Client"}
+    bases[config.ticker] = config.base["Client"]
+    if bases_file:
+        with open(bases_file) as f:
+            bases.update(json.load(f))
+    return bases
 
-    print(table.round(6))
-    
 
-    table.to_csv("multi_goalseek_output.csv")
+def parse_args(argv=None):
+    # config reads the default workbook on import, so only load it once we need the defaults
+    import config
+
+    parser = argparse.ArgumentParser(description="Monte Carlo TSR goal-seek per ticker and forecast year.")
+    parser.add_argument("--tickers", nargs="+", default=[config.ticker])
+    parser.add_argument("--years", nargs="+", default=[config.poa_input],
+                        help="Forecast periods as in the summary workbook, e.g. CY2026 CY2027")
+    parser.add_argument("--excel", default=config.excel_file_path, help="Forecast summary workbook")
+    parser.add_argument("--bases", default=None,
+                        help="JSON file of {ticker: base} historical inputs (see config.base)")
+    parser.add_argument("-n", "--n-simulations", type=int, default=config.n_simulations)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--sampler", choices=SAMPLERS, default="random")
+    parser.add_argument("--backend", choices=BACKENDS, default="numpy",
+                        help="numba runs sampling and TSR as one compiled multithreaded loop (falls back to numpy)")
+    parser.add_argument("--dtype", choices=("float64", "float32"), default="float64",
+                        help="Storage precision of the simulated draws")
+    parser.add_argument("--probs", nargs="+", type=float, default=[0.8, 0.5, 0.2])
+    parser.add_argument("--paths", action="store_true",
+                        help="Simulate all --years as one yearly path per draw and goal-seek each horizon")
+    parser.add_argument("--persistence", type=float, default=0.9,
+                        help="Year-on-year correlation of driver percentiles in --paths mode")
+    parser.add_argument("--portfolio", action="store_true",
+                        help="Goal-seek the weighted TSR of all --tickers for the first of --years")
+    parser.add_argument("--weights", nargs="+", type=float, default=None,
+                        help="Portfolio weights in --tickers order (default: equal)")
+    parser.add_argument("--correlation", type=float, default=0.0,
+                        help="Share of each driver's variance from a factor common to all names in --portfolio mode")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--format", choices=FORMATS, default="csv")
+    parser.add_argument("--store-dir", default=None,
+                        help="Keep each ticker/year's draws and TSR as a memory-mapped store in this directory")
+    parser.add_argument("--output-dir", default=".")
+    parser.add_argument("--output", default="multi_goalseek_output",
+                        help="Output file stem; ticker and year are appended when running several jobs")
+    args = parser.parse_args(argv)
+    if args.format == "parquet" and not any(importlib.util.find_spec(m) for m in ("pyarrow", "fastparquet")):
+        parser.error("--format parquet needs pyarrow or fastparquet installed")
+    if args.backend == "numba" and (args.sampler != "random" or args.paths):
+        parser.error("--backend numba supports --sampler random without --paths only")
+    if not all(0 <= p <= 1 for p in args.probs):
+        parser.error("--probs must be between 0 and 1")
+    if not -1 <= args.persistence <= 1:
+        parser.error("--persistence must be between -1 and 1")
+    if args.paths and (args.sampler != "random" or args.store_dir):
+        parser.error("--paths supports --sampler random without --store-dir only")
+    if not 0 <= args.correlation <= 1:
+        parser.error("--correlation must be between 0 and 1")
+    if args.portfolio and (args.backend != "numpy" or args.sampler != "random" or args.store_dir or args.paths):
+        parser.error("--portfolio supports --backend numpy and --sampler random without --store-dir or --paths only")
+    if args.weights is not None and not args.portfolio:
+        parser.error("--weights needs --portfolio")
+    if args.weights is not None and len(args.weights) != len(args.tickers):
+        parser.error("--weights needs one weight per ticker")
+    if args.weights is not None and (not np.isfinite(args.weights).all() or sum(args.weights) <= 0):
+        parser.error("--weights must be finite with a positive sum")
+    bases = load_bases(config, args.bases)
+    missing = [t for t in args.tickers if t not in bases]
+    if missing:
+        parser.error(f"No base inputs for {', '.join(missing)}; add them to config.base or pass --bases FILE")
+    args.bases = {t: bases[t] for t in args.tickers}
+    for ticker in args.tickers:
+        for poa in args.years[:1] if args.portfolio else args.years:
+            try:
+                horizon_base(args.bases[ticker], int(poa[2:]))
+            except ValueError as exc:
+                parser.error(f"{ticker} {poa}: {exc}")
+    args.build_company = config.build_company
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.portfolio:
+        return main_portfolio(args)
+    if args.paths:
+        jobs = [(t, f"{args.years[0]}-{args.years[-1]}") for t in args.tickers]
+    else:
+        jobs = [(t, y) for t in args.tickers for y in args.years]
+    seeds = np.random.SeedSequence(args.seed).spawn(len(jobs))
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    def output_path(ticker, poa):
+        stem = args.output if len(jobs) == 1 else f"{args.output}_{ticker}_{poa}"
+        return os.path.join(args.output_dir, f"{stem}.{args.format}")
+
+    def company(ticker, poa):
+        company_data = args.build_company(read_summary_from_excel(args.excel, ticker, poa))
+        check_company_data(company_data, f"{ticker} {poa}")
+        return company_data
+
+    def job_args(i):
+        ticker, poa = jobs[i]
+        if args.paths:
+            yearly_company = {int(y[2:]): company(ticker, y) for y in args.years}
+            return run_paths_job, (yearly_company, args.bases[ticker], args.n_simulations, seeds[i],
+                                   args.probs, args.dtype, args.persistence)
+        return run_job, (company(ticker, poa), args.bases[ticker], int(poa[2:]),
+                         args.n_simulations, seeds[i], args.sampler, args.probs, args.dtype,
+                         args.store_dir and os.path.join(args.store_dir, f"{ticker}_{poa}"), args.backend)
+
+    def report(ticker, poa, table):
+        print(f"\n{ticker} {poa}")
+        print(table.round(6))
+        path = output_path(ticker, poa)
+        write_table(table, path, args.format)
+        print(f"Saved {path}")
+
+    # Read every job's stats before simulating, so a year missing from the workbook fails up front
+    try:
+        calls = [job_args(i) for i in range(len(jobs))]
+    except ValueError as exc:
+        raise SystemExit(f"error: {exc}")
+
+    if args.workers <= 1:
+        for (ticker, poa), (fn, fn_args) in zip(jobs, calls):
+            report(ticker, poa, fn(*fn_args))
+        return
+
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(fn, *fn_args): job for job, (fn, fn_args) in zip(jobs, calls)}
+        for future in as_completed(futures):
+            ticker, poa = futures[future]
+            report(ticker, poa, future.result())
+
+
+def main_portfolio(args):
+    poa = args.years[0]
+    constituents = []
+    for ticker in args.tickers:
+        base, years = horizon_base(args.bases[ticker], int(poa[2:]))
+        company = args.build_company(read_summary_from_excel(args.excel, ticker, poa))
+        try:
+            check_company_data(company, f"{ticker} {poa}")
+        except ValueError as exc:
+            raise SystemExit(f"error: {exc}")
+        constituents.append((company, base, years))
+    weights = args.weights or [1.0] * len(args.tickers)
+
+    table = run_portfolio(constituents, weights, args.n_simulations, args.seed, args.probs,
+                          correlation=args.correlation, workers=args.workers, dtype=args.dtype,
+                          tickers=args.tickers)
+    print(f"\nPortfolio of {len(args.tickers)} names {poa}")
+    print(table.round(6))
+    os.makedirs(args.output_dir, exist_ok=True)
+    path = os.path.join(args.output_dir, f"{args.output}_portfolio_{poa}.{args.format}")
+    write_table(table, path, args.format)
+    print(f"Saved {path}")
 
 if __name__ == "__main__":
     main()
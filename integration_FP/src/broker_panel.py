@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Summary statistic label -> quantile
+STATS = {
+    "Median": 0.5,
+    "10th Percentile": 0.1,
+    "90th Percentile": 0.9,
+}
+
+
+class BrokerPanel:
+    """
+    Broker estimates indexed by (ticker, broker, estimate date), sorted so that
+    per-ticker lookups are index slices rather than full-column scans.
+    """
+
+    def __init__(self, df: pd.DataFrame, ticker_col="Ticker", broker_col="Broker Name",
+                 date_col="Estimate Date"):
+        self.ticker_col, self.broker_col, self.date_col = ticker_col, broker_col, date_col
+        # Keep first-seen ticker order for reports
+        self.tickers = list(pd.unique(df[ticker_col]))
+        frame = df.copy()
+        if date_col in frame.columns:
+            frame[date_col] = pd.to_datetime(frame[date_col], errors="coerce")
+        else:
+            frame[date_col] = pd.NaT
+        self.frame = frame.set_index([ticker_col, broker_col, date_col]).sort_index()
+
+    @classmethod
+    def _from_indexed(cls, panel: "BrokerPanel", frame: pd.DataFrame) -> "BrokerPanel":
+        out = cls.__new__(cls)
+        out.ticker_col, out.broker_col, out.date_col = panel.ticker_col, panel.broker_col, panel.date_col
+        tickers = set(frame.index.get_level_values(0))
+        out.tickers = [t for t in panel.tickers if t in tickers]
+        out.frame = frame
+        return out
+
+    def ticker(self, ticker: str) -> pd.DataFrame:
+        """All estimates for one ticker as a flat DataFrame (index columns restored)."""
+        if ticker not in self.tickers:
+            return self.frame.iloc[:0].reset_index()
+        return self.frame.loc[[ticker]].reset_index()
+
+    def as_of(self, date) -> "BrokerPanel":
+        """
+        Latest estimate per (ticker, broker) dated on or before `date`,
+        e.g. panel.as_of("2025-03-01"). Rows without an estimate date are dropped.
+        """
+        dates = self.frame.index.get_level_values(2)
+        frame = self.frame[dates <= pd.Timestamp(date)]
+        return self._from_indexed(self, frame.groupby(level=[0, 1]).tail(1))
+
+    def percentiles(self, metrics: list[str], stats: dict = STATS) -> pd.DataFrame:
+        """
+        Summary statistics of each metric for every ticker in one groupby,
+        indexed by (ticker, statistic). Zeros are excluded, as in the workbook.
+        """
+        values = pd.DataFrame(index=self.frame.index)
+        for metric in metrics:
+            col = self.frame[metric] if metric in self.frame.columns else np.nan
+            values[metric] = pd.to_numeric(col, errors="coerce")
+        values = values.where(values != 0)
+        table = values.groupby(level=0).quantile(list(stats.values()))
+        table.index = pd.MultiIndex.from_arrays(
+            [table.index.get_level_values(0),
+             table.index.get_level_values(1).map({q: s for s, q in stats.items()})],
+            names=[self.ticker_col, "Statistic"],
+        )
+        return table
+
+    def consensus(self, metrics: list[str], as_of=None, stats: dict = STATS) -> pd.DataFrame:
+        """percentiles(), optionally restricted to estimates known at `as_of`."""
+        panel = self if as_of is None else self.as_of(as_of)
+        return panel.percentiles(metrics, stats)
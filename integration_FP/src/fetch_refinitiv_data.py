@@ -1,10 +1,12 @@
 import refinitiv.data as rd
 import pandas as pd
 import numpy as np
+from dataclasses import dataclass
 from datetime import datetime, timedelta
 from openpyxl import Workbook
 from openpyxl.utils import get_column_letter
 import uuid
+from src.broker_panel import BrokerPanel, STATS
 # from builtins import print,int,str,enumerate,len,all,set,float,any,list,ValueError
 
 # Initialize Refinitiv session
@@ -16,8 +18,8 @@ poa_type = poa_input[:2]
 poa_year = int(poa_input[2:])
 companies = ['CRDA.L']
 scale = 6
-pod_cutoff_estimate = pd.to_datetime("2024-11-01").date()
-today = pd.to_datetime("today").normalize().date()
+pod_cutoff_estimate = pd.Timestamp("2024-11-01")
+today = pd.Timestamp.today().normalize()
 cutoff_date_POA = today + timedelta(days=3650)
 
 # Column names (dynamic)
@@ -85,10 +87,22 @@ refinitiv_override = {
     "PERMISSION DENIED 85152": "CANACCORD GENUITY"
 }
 
+# Dates stay datetime64 through the pipeline and are only formatted for output
+date_format = "%d %b %y"
+excel_date_format = "dd mmm yy"
+
+def to_datetime64(values):
+    # Refinitiv returns ISO date strings; an explicit format skips per-value inference
+    # and the cache parses each distinct date once
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    return pd.to_datetime(values, errors="coerce", format="ISO8601", cache=True)
+
 def format_dates(df):
-    date_columns = [col for col in df.columns if "Date" in col]
+    df = df.copy()
+    date_columns = [col for col in df.columns if pd.api.types.is_datetime64_any_dtype(df[col])]
     for col in date_columns:
-        df[col] = pd.to_datetime(df[col], errors="coerce").dt.strftime("%d %b %y")
+        df[col] = df[col].dt.strftime(date_format)
     return df
 
 def consolidate_refinitiv_data(df, key_columns=None):
@@ -103,8 +117,10 @@ def consolidate_refinitiv_data(df, key_columns=None):
     
     numeric_cols = df.select_dtypes(include=['number']).columns.tolist()
     
+    date_cols = df.select_dtypes(include=['datetime']).columns.tolist()
+    
     for col in df.columns:
-        if col not in numeric_cols:
+        if col not in numeric_cols and col not in date_cols:
             try:
                 temp = pd.to_numeric(df[col], errors='coerce')
                 if temp.notna().mean() > 0.5:
@@ -131,93 +147,104 @@ def apply_broker_overrides(df):
             df[col_broker_name] = df[col_broker_name].replace(denied_key, broker_name)
     return df
 
-def get_metric_cy(metric_code, label, scale_on=True):
-    scale_str = f",Scale={scale}" if scale_on else ""
-    df = rd.get_data(
-        universe=companies,
-        fields=[f"{metric_code}.brokername;{metric_code}.date;{metric_code}{scale_str}"],
-        parameters={"Period": poa_input}
-    )
-    df.columns = [col_ticker, col_broker_name, col_estimate_date, label]
-    
-    df = apply_broker_overrides(df)
-    df[col_estimate_date] = pd.to_datetime(df[col_estimate_date], errors="coerce").dt.date
-    df = df[(df[col_estimate_date] >= pod_cutoff_estimate)]
-    return df.dropna(subset=[col_broker_name, col_estimate_date, label])
+@dataclass(frozen=True)
+class MetricSpec:
+    label: str                     # value column in the panel
+    code: str                      # Refinitiv estimate field
+    scaled: bool = True            # request with Scale=scale
+    date_label: str | None = None  # also fan the estimate date out to this column
+    cutoff: bool = True            # drop estimates dated before pod_cutoff_estimate
 
-def get_metric_fy(metric_code, label, scale_on=True):
+def plan_requests(registry):
+    # One request per distinct (code, scaled); every spec sharing it reuses the response
+    plan = {}
+    for spec in registry:
+        plan.setdefault((spec.code, spec.scaled), []).append(spec)
+    return plan
+
+def request_metric(metric_code, scale_on=True):
     scale_str = f",Scale={scale}" if scale_on else ""
     df = rd.get_data(
         universe=companies,
         fields=[f"{metric_code}.brokername;{metric_code}.date;{metric_code}{scale_str}"],
         parameters={"Period": poa_input}
     )
-    df.columns = [col_ticker, col_broker_name, col_estimate_date, label]
+    df.columns = [col_ticker, col_broker_name, col_estimate_date, metric_code]
     
     df = apply_broker_overrides(df)
-    df[col_estimate_date] = pd.to_datetime(df[col_estimate_date], errors="coerce").dt.date
-    df = df[(df[col_estimate_date] >= pod_cutoff_estimate)]
-    return df.dropna(subset=[col_broker_name, col_estimate_date, label])
+    df[col_estimate_date] = to_datetime64(df[col_estimate_date])
+    return df
 
-def get_estimate_date(metric_date_field, label):
-    df = rd.get_data(
-        universe=companies,
-        fields=[f"{metric_date_field}.brokername;{metric_date_field}.date"],
-        parameters={"Period": poa_input}
-    )
-    df.columns = [col_ticker, col_broker_name, label]
-    
-    df = apply_broker_overrides(df)
-    df[label] = pd.to_datetime(df[label], errors="coerce").dt.date
-    return df.dropna(subset=[col_broker_name, label])
+def fetch_registry(registry):
+    """Fetch every metric in the registry; returns ({label: values}, [estimate date frames])."""
+    values, dates = {}, []
+    for (code, scaled), specs in plan_requests(registry).items():
+        raw = request_metric(code, scale_on=scaled)
+        for spec in specs:
+            df = raw.rename(columns={code: spec.label})
+            if spec.cutoff:
+                df = df[(df[col_estimate_date] >= pod_cutoff_estimate)]
+                df = df.dropna(subset=[col_broker_name, col_estimate_date, spec.label])
+            else:
+                df = df[[col_ticker, col_broker_name, spec.label]]
+                df = df.dropna(subset=[col_broker_name, spec.label]).drop_duplicates(subset=[col_ticker, col_broker_name])
+            values[spec.label] = df
+            
+            if spec.date_label:
+                date_df = raw[[col_ticker, col_broker_name, col_estimate_date]].rename(columns={col_estimate_date: spec.date_label})
+                dates.append(date_df.dropna(subset=[col_broker_name, spec.date_label]))
+    return values, dates
 
 def create_multi_metric_forecast_summary(df, metrics, output_file="Multi_Metric_Forecast_Summary.xlsx"):
     wb = Workbook()
     ws = wb.active
     ws.title = "Forecast Summary"
     
+    # Index the panel once; per-ticker rows and all percentiles come from it
+    broker_panel = BrokerPanel(df, col_ticker, col_broker_name, col_estimate_date)
+    summary = broker_panel.percentiles(metrics)
+    
     # Define the statistical measures for the summary table
-    stats_measures = [
-        "Median",
-        "10th Percentile",
-        "90th Percentile"
-    ]
+    stats_measures = list(STATS)
     
     current_row = 1
-    tickers = df[col_ticker].unique()
+    tickers = broker_panel.tickers
+    
+    # Define columns for the forecast panel
+    display_cols = [
+        col_ticker, col_broker_name, col_analyst_name,
+        f"{col_revenue} {poa_input}", f"{col_ebitda} {poa_input}",
+        col_price, f"{col_net_debt} {poa_input}", f"{col_shares} {poa_input}",
+        f"{col_ebitda_margin} {poa_input}", f"{col_ev_ebitda} {poa_input}",
+        f"{poa_input} {col_div_yield}", col_ebitda_12m_fwd
+    ]
+    valid_cols = [col for col in display_cols if col in df.columns]
+    
+    def summary_value(ticker, stat, metric):
+        value = summary.at[(ticker, stat), metric]
+        return None if pd.isna(value) else value
     
     for ticker in tickers:
-        ticker_data = df[df[col_ticker] == ticker].copy()
+        ticker_data = broker_panel.ticker(ticker)
         
         # Write the forecast panel header
         ws.cell(row=current_row, column=1, value=f"{ticker} FORECAST PANEL")
         current_row += 1
         
-        # Define columns for the forecast panel
-        display_cols = [
-            col_ticker, col_broker_name, col_analyst_name,
-            f"{col_revenue} {poa_input}", f"{col_ebitda} {poa_input}",
-            col_price, f"{col_net_debt} {poa_input}", f"{col_shares} {poa_input}",
-            f"{col_ebitda_margin} {poa_input}", f"{col_ev_ebitda} {poa_input}",
-            f"{poa_input} {col_div_yield}", col_ebitda_12m_fwd
-        ]
-        valid_cols = [col for col in display_cols if col in df.columns]
-        
         # Write forecast panel headers
         for col_idx, header in enumerate(valid_cols, 1):
             ws.cell(row=current_row, column=col_idx, value=header)
         current_row += 1
         
-        # Write forecast panel data and track the row range
-        start_data_row = current_row
-        for _, row in ticker_data.iterrows():
-            for col_idx, header in enumerate(valid_cols, 1):
-                value = row.get(header, None)
+        # Write forecast panel data
+        for row in ticker_data[valid_cols].itertuples(index=False):
+            for col_idx, value in enumerate(row, 1):
                 if pd.isna(value):
                     value = None
-                ws.cell(row=current_row, column=col_idx, value=value)
+                cell = ws.cell(row=current_row, column=col_idx, value=value)
+                if isinstance(value, pd.Timestamp):
+                    cell.number_format = excel_date_format
             current_row += 1
-        end_data_row = current_row - 1
         
         # Add one-row gap after forecast panel
         current_row += 1
@@ -232,35 +259,13 @@ def create_multi_metric_forecast_summary(df, metrics, output_file="Multi_Metric_
             ws.cell(row=current_row, column=col_idx, value=metric)
         current_row += 1
         
-        # Write summary table
-        for stat_idx, stat in enumerate(stats_measures, 1):
+        # Write summary table (zeros already excluded, matching IF(<range><>0, ...))
+        for stat in stats_measures:
             ws.cell(row=current_row, column=1, value=stat)
             for col_idx, metric in enumerate(metrics, 2):
                 if metric not in valid_cols:
                     continue
-                # Extract the data for numpy calculations
-                values = ticker_data.get(metric, pd.Series()).dropna()
-                try:
-                    values = values.astype(float)
-                except:
-                    ws.cell(row=current_row, column=col_idx, value=None)
-                    continue
-                
-                # Filter out zeros to match IF(<range><>0, ...)
-                filtered_values = values[values != 0]
-                if len(filtered_values) == 0:
-                    value = None
-                else:
-                    if stat == "Median":
-                        value = np.median(filtered_values)
-                    elif stat == "10th Percentile":
-                        value = np.percentile(filtered_values, 10)
-                    elif stat == "90th Percentile":
-                        value = np.percentile(filtered_values, 90)
-                    else:
-                        value = None
-                # Write the static value
-                ws.cell(row=current_row, column=col_idx, value=value)
+                ws.cell(row=current_row, column=col_idx, value=summary_value(ticker, stat, metric))
                 
                 # Apply percentage format for specific metrics
                 if any(m in metric for m in ["Margin", "Dividend Yield"]):
@@ -277,82 +282,39 @@ def create_multi_metric_forecast_summary(df, metrics, output_file="Multi_Metric_
     # Return a dictionary of DataFrames for verification
     summary_dfs = {}
     for ticker in tickers:
-        ticker_data = df[df[col_ticker] == ticker].copy()
-        forecast_df = ticker_data[valid_cols]
-        
         summary_data = []
         for stat in stats_measures:
             stat_row = {"Statistic": stat}
             for metric in metrics:
-                values = ticker_data.get(metric, pd.Series()).dropna()
-                try:
-                    values = values.astype(float)
-                except:
-                    stat_row[metric] = None
-                    continue
-                if len(values) == 0:
-                    stat_row[metric] = None
-                    continue
-                    
-                # Filter out zeros for percentiles
-                filtered_values = values[values != 0]
-                if len(filtered_values) == 0:
-                    stat_row[metric] = None
-                    continue
-                if stat == "Median":
-                    value = np.median(filtered_values)
-                elif stat == "10th Percentile":
-                    value = np.percentile(filtered_values, 10)
-                elif stat == "90th Percentile":
-                    value = np.percentile(filtered_values, 90)
-                else:
-                    value = None
-                
-                if value is not None:
-                    if any(m in metric for m in ["Margin", "Dividend Yield"]):
-                        value = value * 100
-                    stat_row[metric] = value
-                else:
-                    stat_row[metric] = None
+                value = summary_value(ticker, stat, metric)
+                if value is not None and any(m in metric for m in ["Margin", "Dividend Yield"]):
+                    value = value * 100
+                stat_row[metric] = value
             summary_data.append(stat_row)
         
         summary_dfs[ticker] = {
-            "Forecast Panel": forecast_df,
+            "Forecast Panel": broker_panel.ticker(ticker)[valid_cols],
             "Summary": pd.DataFrame(summary_data)
         }
     
     return summary_dfs
 
 # Main data processing
-metrics = {
-    f"{col_revenue} {poa_input}": "TR.RevenueEstValue",
-    f"{col_ebitda} {poa_input}": "TR.EBITDAEstValue",
-    f"{col_ebit} {poa_input}": "TR.EBITEstValue",
-    f"{col_net_debt} {poa_input}": "TR.NetDebtEstValue",
-    f"{col_dps} {poa_input}": "TR.DPSEstValue",
-    f"{col_ev} {poa_input}": "TR.EVEstValue"
-}
-
-raw_data_frames = {}
-data_frames = []
-for label, code in metrics.items():
-    if poa_type == "CY":
-        df = get_metric_cy(code, label, scale_on=False if col_dps in label else True)
-    else:
-        df = get_metric_fy(code, label, scale_on=False if col_dps in label else True)
-    data_frames.append(df)
-    raw_data_frames[label] = df.copy()
+metric_registry = [
+    MetricSpec(f"{col_revenue} {poa_input}", "TR.RevenueEstValue", date_label=f"{poa_input} {col_rev_date}"),
+    MetricSpec(f"{col_ebitda} {poa_input}", "TR.EBITDAEstValue", date_label=f"{poa_input} {col_ebitda_date}"),
+    MetricSpec(f"{col_ebit} {poa_input}", "TR.EBITEstValue"),
+    MetricSpec(f"{col_net_debt} {poa_input}", "TR.NetDebtEstValue", date_label=f"{poa_input} {col_net_debt_date}"),
+    MetricSpec(f"{col_dps} {poa_input}", "TR.DPSEstValue", scaled=False),
+    MetricSpec(f"{col_ev} {poa_input}", "TR.EVEstValue"),
+    MetricSpec(f"{col_shares} {poa_input}", "TR.NumberOfSharesOutstanding", scaled=False,
+               date_label=f"{poa_input} {col_shares_date}", cutoff=False),
+]
 
-# Shares data
-shares_df = rd.get_data(
-    universe=companies,
-    fields=[f"TR.NumberOfSharesOutstanding.brokername;TR.NumberOfSharesOutstanding(Period={poa_input})"]
-)
-shares_df.columns = [col_ticker, col_broker_name, f"{col_shares} {poa_input}"]
-shares_df = apply_broker_overrides(shares_df)
-shares_df = shares_df.dropna(subset=[col_broker_name, f"{col_shares} {poa_input}"]).drop_duplicates(subset=[col_ticker, col_broker_name])
-data_frames.append(shares_df)
-raw_data_frames[f"{col_shares} {poa_input}"] = shares_df.copy()
+# Metric values and their estimate dates come from the same requests
+metric_frames, date_frames = fetch_registry(metric_registry)
+raw_data_frames = {label: df.copy() for label, df in metric_frames.items()}
+data_frames = list(metric_frames.values())
 
 # Price data
 price_df = rd.get_data(
@@ -370,7 +332,7 @@ rec_df = rd.get_data(
 )
 rec_df.columns = [col_ticker, col_broker_name, col_rec_label, col_rec_date]
 rec_df = apply_broker_overrides(rec_df)
-rec_df[col_rec_date] = pd.to_datetime(rec_df[col_rec_date], errors="coerce").dt.date
+rec_df[col_rec_date] = to_datetime64(rec_df[col_rec_date])
 rec_df = rec_df.drop_duplicates(subset=[col_ticker, col_broker_name])
 data_frames.append(rec_df)
 raw_data_frames[col_rec_label] = rec_df.copy()
@@ -383,17 +345,13 @@ tp_df = rd.get_data(
 )
 tp_df.columns = [col_ticker, col_broker_name, col_target_date, col_target_price, col_analyst_name]
 tp_df = apply_broker_overrides(tp_df)
-tp_df[col_target_date] = pd.to_datetime(tp_df[col_target_date], errors="coerce").dt.date
+tp_df[col_target_date] = to_datetime64(tp_df[col_target_date])
 tp_df = tp_df.drop_duplicates(subset=[col_ticker, col_broker_name])
 data_frames.append(tp_df)
 raw_data_frames[col_target_price] = tp_df.copy()
 
 # Date fields
-revenue_date_df = get_estimate_date("TR.RevenueEstDate", f"{poa_input} {col_rev_date}")
-ebitda_date_df = get_estimate_date("TR.EBITDAEstDate", f"{poa_input} {col_ebitda_date}")
-netdebt_date_df = get_estimate_date("TR.NetDebtEstDate", f"{poa_input} {col_net_debt_date}")
-shares_date_df = get_estimate_date("TR.NumberOfSharesOutstanding", f"{poa_input} {col_shares_date}")
-data_frames.extend([revenue_date_df, ebitda_date_df, netdebt_date_df, shares_date_df])
+data_frames.extend(date_frames)
 
 # Consolidate data
 all_tickers_brokers = pd.DataFrame()
@@ -436,9 +394,6 @@ if all(col in panel.columns for col in [f"{col_dps} {poa_input}", col_price]):
 # Assume EBITDA (12M Fwd) is the same as EBITDA for this example; adjust if different data source
 panel[col_ebitda_12m_fwd] = panel[f"{col_ebitda} {poa_input}"]
 
-# Format dates
-panel = format_dates(panel)
-
 # Define metrics for the summary table
 metrics_to_analyze = [
     f"{col_revenue} {poa_input}",
@@ -458,7 +413,7 @@ summary_dfs = create_multi_metric_forecast_summary(panel, metrics_to_analyze, ou
 # Print the DataFrames for verification
 for ticker, dfs in summary_dfs.items():
     print(f"\nForecast Panel for {ticker}:")
-    print(dfs["Forecast Panel"])
+    print(format_dates(dfs["Forecast Panel"]))
     # Define number of simulations
     n_simulations = 10000
 
@@ -1,19 +1,40 @@
 import numpy as np
 import pandas as pd
 from scipy.optimize import brentq
-from src.tsr import compute_tsr
+from src.results import Draws
+from src.tsr import tsr_kernel
+
+
+def _sorted(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return np.sort(values[~np.isnan(values)])
+
+
+def _quantile(sorted_values: np.ndarray, q: float) -> float:
+    # Linear interpolation on pre-sorted data, matching pd.Series.quantile
+    if not 0 <= q <= 1:
+        raise ValueError(f"Quantile must be in [0, 1], got {q}")
+    if len(sorted_values) == 0:
+        return np.nan
+    pos = q * (len(sorted_values) - 1)
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
 
 def find_equal_p(
-    df: pd.DataFrame,
+    df,
     base: dict,
     years: float,
     tsr_probs: list[float],
     tol: float = 1e-6
 ) -> pd.DataFrame:
-    rev = df["Revenue"]
-    marg = df["EBITDA Margin"]
-    mult = df["EV/EBITDA"]
-    tsr_s = df["TSR"]
+    draws = df if isinstance(df, Draws) else Draws.from_frame(df)
+    # Sort once so each quantile inside the root search is O(1)
+    rev = _sorted(draws.revenue)
+    marg = _sorted(draws.ebitda_margin)
+    mult = _sorted(draws.ev_ebitda)
+    tsr_s = _sorted(draws.tsr)
     D1 = base["net_debt_2026"]
     S1 = base["shares_2026"]
     Y1 = base["div_yield_2026"]
@@ -21,12 +42,12 @@ def find_equal_p(
     def tsr_at(p_input):
         # Clamp p_input strictly within (0, 1)
         p_input = np.clip(p_input, tol, 1 - tol)
-        row = pd.DataFrame({
-            "Revenue": [rev.quantile(1 - p_input)],
-            "EBITDA Margin": [marg.quantile(1 - p_input)],
-            "EV/EBITDA": [mult.quantile(1 - p_input)]
-        })
-        result = compute_tsr(row, base, years)["TSR"].iloc[0]
+        result = float(tsr_kernel(
+            _quantile(rev, 1 - p_input),
+            _quantile(marg, 1 - p_input),
+            _quantile(mult, 1 - p_input),
+            base, years
+        ))
         # Handle NaN or inf values explicitly
         if np.isnan(result) or np.isinf(result):
             return np.nan
@@ -34,7 +55,7 @@ def find_equal_p(
 
     out = []
     for p in tsr_probs:
-        target = tsr_s.quantile(1 - p)
+        target = _quantile(tsr_s, 1 - p)
 
         a, b = tol, 1 - tol
         try:
@@ -52,9 +73,9 @@ def find_equal_p(
             # If solution isn't valid, set threshold as NaN
             thr_rev = thr_marg = thr_mult = market_cap = share_price = np.nan
         else:
-            thr_rev = rev.quantile(1 - p_in)
-            thr_marg = marg.quantile(1 - p_in)
-            thr_mult = mult.quantile(1 - p_in)
+            thr_rev = _quantile(rev, 1 - p_in)
+            thr_marg = _quantile(marg, 1 - p_in)
+            thr_mult = _quantile(mult, 1 - p_in)
             market_cap = thr_mult * thr_rev * thr_marg - D1
             share_price = market_cap / S1
 
@@ -0,0 +1,119 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+from scipy.stats import ks_2samp
+
+from src.monte_carlo import DRIVERS, simulate
+from src.results import Draws
+from src.tsr import compute_tsr, tsr_constants
+
+# Numba is optional; without it simulate_tsr runs the NumPy simulate + compute_tsr path
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAVE_NUMBA = numba is not None
+BACKENDS = ("numpy", "numba")
+CHUNK_SIZE = 65_536
+
+
+if HAVE_NUMBA:
+    @numba.njit(inline="always")
+    def _uniform(key, counter):
+        # splitmix64 of (key, counter): reproducible whatever the thread/chunk layout
+        z = key + (counter + np.uint64(1)) * np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+        return (z >> np.uint64(11)) * (1.0 / 9007199254740992.0)
+
+    @numba.njit(inline="always")
+    def _triangular_ppf(u, left, mode, right):
+        if u < (mode - left) / (right - left):
+            return left + np.sqrt(u * (right - left) * (mode - left))
+        return right - np.sqrt((1 - u) * (right - left) * (right - mode))
+
+    @numba.njit(parallel=True)
+    def _simulate_tsr_kernel(key, params, growth, div, D1, inv_years, chunk,
+                             rev, marg, mult, tsr):
+        n = rev.shape[0]
+        n_chunks = (n + chunk - 1) // chunk
+        for c in numba.prange(n_chunks):
+            for i in range(c * chunk, min(n, (c + 1) * chunk)):
+                counter = np.uint64(3 * i)
+                r = _triangular_ppf(_uniform(key, counter), params[0, 0], params[0, 1], params[0, 2])
+                m = _triangular_ppf(_uniform(key, counter + np.uint64(1)), params[1, 0], params[1, 1], params[1, 2])
+                e = _triangular_ppf(_uniform(key, counter + np.uint64(2)), params[2, 0], params[2, 1], params[2, 2])
+                cap1 = r * m * e - D1
+                rev[i] = r
+                marg[i] = m
+                mult[i] = e
+                tsr[i] = (cap1 * growth) ** inv_years - 1 + cap1 * div
+
+
+def _compiled(company_data, base, years, n, seed, dtype, out, chunk):
+    if out is None:
+        out = Draws(*(np.empty(n, dtype=dtype) for _ in range(4)))
+    elif out.tsr is None:
+        out.tsr = np.empty(n, dtype=out.dtype)
+    params = np.array([
+        [company_data[key]["0th"], company_data[key]["median"], company_data[key]["100th"]]
+        for key in DRIVERS.values()
+    ], dtype=np.float64)
+    growth, div, D1, inv_years = tsr_constants(base, years)
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    key = seed.generate_state(1, np.uint64)[0]
+    _simulate_tsr_kernel(key, params, float(growth), float(div), float(D1), float(inv_years), chunk,
+                         out.revenue, out.ebitda_margin, out.ev_ebitda, out.tsr)
+    return out
+
+
+def simulate_tsr(
+    company_data: dict,
+    base: dict,
+    years: float,
+    n: int,
+    seed=None,
+    backend: str = "numba",
+    dtype=np.float64,
+    out: Draws | None = None,
+    chunk: int = CHUNK_SIZE
+) -> Draws:
+    """
+    simulate + compute_tsr in one pass. The numba backend draws triangular
+    variates and TSR together in a parallel loop over chunks of `chunk` draws;
+    it falls back to NumPy (with a warning) when numba is not installed.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    if backend == "numba" and not HAVE_NUMBA:
+        warnings.warn("numba is not installed; using the NumPy backend")
+        backend = "numpy"
+    if backend == "numba":
+        return _compiled(company_data, base, years, n, seed, dtype, out, chunk)
+
+    draws = simulate(company_data, n, rng=np.random.default_rng(seed), dtype=dtype, out=out)
+    return compute_tsr(draws, base, years)
+
+
+def compare_backends(company_data: dict, base: dict, years: float, n: int = 200_000,
+                     seed=0) -> pd.DataFrame:
+    """
+    Two-sample Kolmogorov-Smirnov test of each column from the numba backend
+    against simulate + compute_tsr. Large p-values mean the distributions agree.
+    """
+    compiled = simulate_tsr(company_data, base, years, n, seed=seed, backend="numba").to_frame()
+    reference = simulate_tsr(company_data, base, years, n, seed=seed, backend="numpy").to_frame()
+    rows = {}
+    for col in reference.columns:
+        res = ks_2samp(compiled[col], reference[col])
+        rows[col] = {
+            "ks_statistic": res.statistic,
+            "p_value": res.pvalue,
+            "mean_numba": compiled[col].mean(),
+            "mean_numpy": reference[col].mean(),
+        }
+    return pd.DataFrame(rows).T
@@ -1,28 +1,70 @@
 import numpy as np
-import pandas as pd
-
-def simulate(company_data: dict, n: int) -> pd.DataFrame:
-    """Generate triangular Monte Carlo draws for Rev, Margin, EV/EBITDA."""
-    rev = np.random.triangular(
-        company_data["Revenue"]["0th"],
-        company_data["Revenue"]["median"],
-        company_data["Revenue"]["100th"],
-        n
-    )
-    marg = np.random.triangular(
-        company_data["EBITDA_Margin"]["0th"],
-        company_data["EBITDA_Margin"]["median"],
-        company_data["EBITDA_Margin"]["100th"],
-        n
-    )
-    mult = np.random.triangular(
-        company_data["EV_EBITDA"]["0th"],
-        company_data["EV_EBITDA"]["median"],
-        company_data["EV_EBITDA"]["100th"],
-        n
+from src.results import Draws
+
+SAMPLERS = ("random", "lhs")
+
+# Draws field -> company_data key
+DRIVERS = {
+    "revenue": "Revenue",
+    "ebitda_margin": "EBITDA_Margin",
+    "ev_ebitda": "EV_EBITDA",
+}
+
+
+def check_company_data(company_data: dict, label: str):
+    """Raise ValueError when a driver's summary stats are missing (NaN), e.g. a year not in the workbook."""
+    for key in DRIVERS.values():
+        params = company_data[key]
+        if np.isnan([params["0th"], params["median"], params["100th"]]).any():
+            raise ValueError(f"Missing {key} inputs for {label}")
+
+
+def _triangular_ppf(u: np.ndarray, left: float, mode: float, right: float) -> np.ndarray:
+    """Inverse CDF of the triangular distribution."""
+    c = (mode - left) / (right - left)
+    return np.where(
+        u < c,
+        left + np.sqrt(u * (right - left) * (mode - left)),
+        right - np.sqrt((1 - u) * (right - left) * (right - mode)),
     )
-    return pd.DataFrame({
-        "Revenue": rev,
-        "EBITDA Margin": marg,
-        "EV/EBITDA": mult
-    })
+
+
+def _triangular(params: dict, n: int, rng, sampler: str) -> np.ndarray:
+    left, mode, right = params["0th"], params["median"], params["100th"]
+    if sampler == "lhs":
+        # One uniform per stratum, strata shuffled independently per driver
+        u = (rng.permutation(n) + rng.random(n)) / n
+        return _triangular_ppf(u, left, mode, right)
+    if rng is None:
+        return np.random.triangular(left, mode, right, n)
+    return rng.triangular(left, mode, right, n)
+
+
+def simulate(
+    company_data: dict,
+    n: int,
+    rng: np.random.Generator | None = None,
+    sampler: str = "random",
+    dtype=np.float64,
+    out: Draws | None = None
+) -> Draws:
+    """
+    Generate triangular Monte Carlo draws for Rev, Margin, EV/EBITDA.
+    `rng` defaults to the global np.random state; sampler is 'random' or 'lhs'.
+    Pass dtype=np.float32 to halve the memory held per draw, or `out` to fill
+    preallocated arrays (e.g. a DrawStore) in place of new ones.
+    """
+    if sampler not in SAMPLERS:
+        raise ValueError(f"Unknown sampler '{sampler}', expected one of {SAMPLERS}")
+    if sampler == "lhs" and rng is None:
+        rng = np.random.default_rng()
+
+    # One driver at a time, so filling `out` holds at most one temporary array
+    arrays = {}
+    for name, key in DRIVERS.items():
+        values = _triangular(company_data[key], n, rng, sampler)
+        if out is not None:
+            getattr(out, name)[:] = values
+        else:
+            arrays[name] = values.astype(dtype, copy=False)
+    return out if out is not None else Draws(**arrays)
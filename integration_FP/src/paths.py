@@ -0,0 +1,94 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+
+from src.goals import find_equal_p
+from src.monte_carlo import DRIVERS, _triangular_ppf, check_company_data
+from src.results import Draws
+from src.tsr import horizon_base, tsr_kernel
+
+
+@dataclass
+class PathDraws:
+    """
+    Yearly trajectories for Rev, Margin, EV/EBITDA. Each array has shape
+    (len(years), n), so every horizon is a contiguous row.
+    """
+    years: list[int]
+    revenue: np.ndarray
+    ebitda_margin: np.ndarray
+    ev_ebitda: np.ndarray
+    tsr: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return self.revenue.shape[1]
+
+    def horizon(self, year: int) -> Draws:
+        """Draws for a single forecast year, as views into the path arrays."""
+        t = self.years.index(year)
+        return Draws(
+            revenue=self.revenue[t],
+            ebitda_margin=self.ebitda_margin[t],
+            ev_ebitda=self.ev_ebitda[t],
+            tsr=None if self.tsr is None else self.tsr[t],
+        )
+
+
+def simulate_paths(
+    yearly_company_data: dict[int, dict],
+    n: int,
+    rng: np.random.Generator | None = None,
+    persistence: float = 0.9,
+    dtype=np.float64
+) -> PathDraws:
+    """
+    Simulate n yearly paths, one step per forecast year in `yearly_company_data`
+    (year -> company_data as passed to simulate). Each year keeps its own
+    triangular marginal; a driver's percentile follows a Gaussian AR(1) across
+    years with correlation `persistence` (1.0 keeps it fixed along the path).
+    """
+    if not -1 <= persistence <= 1:
+        raise ValueError(f"persistence must be in [-1, 1], got {persistence}")
+    if rng is None:
+        rng = np.random.default_rng()
+    years = sorted(yearly_company_data)
+    for year in years:
+        check_company_data(yearly_company_data[year], year)
+
+    shock = np.sqrt(1 - persistence ** 2)
+    arrays = {}
+    for name, key in DRIVERS.items():
+        out = np.empty((len(years), n), dtype=dtype)
+        z = rng.standard_normal(n)
+        for t, year in enumerate(years):
+            if t:
+                z = persistence * z + shock * rng.standard_normal(n)
+            params = yearly_company_data[year][key]
+            out[t] = _triangular_ppf(ndtr(z), params["0th"], params["median"], params["100th"])
+        arrays[name] = out
+    return PathDraws(years=years, **arrays)
+
+
+def compute_path_tsr(paths: PathDraws, base: dict) -> PathDraws:
+    """
+    TSR from BASE_YEAR to every year on the path, written into paths.tsr.
+    `base` needs the end-of-horizon inputs of every year (see horizon_base).
+    """
+    if paths.tsr is None:
+        paths.tsr = np.empty_like(paths.revenue)
+    for t, year in enumerate(paths.years):
+        year_base, years = horizon_base(base, year)
+        tsr_kernel(paths.revenue[t], paths.ebitda_margin[t], paths.ev_ebitda[t],
+                   year_base, years, out=paths.tsr[t])
+    return paths
+
+
+def find_equal_p_paths(paths: PathDraws, base: dict, tsr_probs: list[float]) -> pd.DataFrame:
+    """find_equal_p for every horizon on the path, indexed by (year, p_tsr)."""
+    tables = {}
+    for year in paths.years:
+        year_base, years = horizon_base(base, year)
+        tables[year] = find_equal_p(paths.horizon(year), year_base, years, tsr_probs=tsr_probs)
+    return pd.concat(tables, names=["year"])
@@ -0,0 +1,155 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import brentq
+from scipy.special import ndtr
+
+from src.goals import _quantile, _sorted
+from src.monte_carlo import DRIVERS, _triangular_ppf
+from src.tsr import tsr_constants
+
+CHUNK_SIZE = 65_536
+
+
+def _normalised(weights) -> np.ndarray:
+    weights = np.asarray(weights, dtype=np.float64)
+    if not np.isfinite(weights).all() or weights.sum() <= 0:
+        raise ValueError(f"Weights must be finite with a positive sum, got {weights.tolist()}")
+    return weights / weights.sum()
+
+
+def _constituent_arrays(constituents: list[tuple[dict, dict, float]]):
+    """
+    Stack (company_data, base, years) per name into arrays: params (driver, left/mode/right, name)
+    and TSR constants (growth/div/D1/inv_years, name).
+    """
+    params = np.array([
+        [[c[key]["0th"] for c, _, _ in constituents],
+         [c[key]["median"] for c, _, _ in constituents],
+         [c[key]["100th"] for c, _, _ in constituents]]
+        for key in DRIVERS.values()
+    ], dtype=np.float64)
+    consts = np.array([tsr_constants(base, years) for _, base, years in constituents], dtype=np.float64).T
+    return params, consts
+
+
+def _portfolio_chunk(params, consts, weights, size, seed, correlation, dtype):
+    """Weighted TSR for one chunk of draws, accumulated one constituent at a time."""
+    rng = np.random.default_rng(seed)
+    # One common factor per driver; correlation is the factor's share of each name's variance
+    factors = rng.standard_normal((len(DRIVERS), size))
+    a, b = np.sqrt(correlation), np.sqrt(1 - correlation)
+    total = np.zeros(size, dtype=dtype)
+    for i, w in enumerate(weights):
+        cap1 = np.ones(size, dtype=dtype)
+        for j in range(len(DRIVERS)):
+            u = ndtr(a * factors[j] + b * rng.standard_normal(size))
+            cap1 *= _triangular_ppf(u, *params[j, :, i])
+        growth, div, D1, inv_years = consts[:, i]
+        cap1 -= D1
+        total += w * ((cap1 * growth) ** inv_years - 1 + cap1 * div)
+    return total
+
+
+def simulate_portfolio_tsr(
+    constituents: list[tuple[dict, dict, float]],
+    weights,
+    n: int,
+    seed=None,
+    correlation: float = 0.0,
+    chunk: int = CHUNK_SIZE,
+    workers: int = 1,
+    dtype=np.float64
+) -> np.ndarray:
+    """
+    Portfolio TSR per draw for constituents given as (company_data, base, years).
+    Draws are generated chunk by chunk and reduced straight into the weighted sum,
+    so memory is O(n + chunk) whatever the number of names. Weights are normalised
+    to sum to one. Chunks get their own child seeds, so results do not depend on `workers`.
+    """
+    if not 0 <= correlation <= 1:
+        raise ValueError(f"correlation must be in [0, 1], got {correlation}")
+    weights = _normalised(weights)
+    params, consts = _constituent_arrays(constituents)
+    sizes = [min(chunk, n - start) for start in range(0, n, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = [(params, consts, weights, size, s, correlation, dtype) for size, s in zip(sizes, seeds)]
+
+    if workers <= 1:
+        parts = [_portfolio_chunk(*a) for a in args]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_portfolio_chunk, *zip(*args)))
+    return np.concatenate(parts)
+
+
+def find_equal_p_portfolio(
+    portfolio_tsr: np.ndarray,
+    constituents: list[tuple[dict, dict, float]],
+    weights,
+    tsr_probs: list[float],
+    tickers: list[str] | None = None,
+    tol: float = 1e-6
+) -> pd.DataFrame:
+    """
+    find_equal_p on the portfolio: the common driver percentile p at which the
+    weighted TSR of all names hits each TSR quantile. Constituent driver
+    quantiles come from the triangular inverse CDF, so no per-name draws are kept.
+    Returns one row per (p_tsr, ticker) with that name's thresholds at p.
+    """
+    weights = _normalised(weights)
+    params, consts = _constituent_arrays(constituents)
+    growth, div, D1, inv_years = consts
+    S1 = np.array([base["shares_2026"] for _, base, _ in constituents], dtype=np.float64)
+    if tickers is None:
+        tickers = list(range(len(constituents)))
+    tsr_s = _sorted(portfolio_tsr)
+
+    def thresholds_at(p_input):
+        # (driver, name) quantiles at the common percentile
+        return np.array([_triangular_ppf(1 - p_input, *params[j]) for j in range(len(DRIVERS))])
+
+    def tsr_at(p_input):
+        p_input = np.clip(p_input, tol, 1 - tol)
+        cap1 = np.prod(thresholds_at(p_input), axis=0) - D1
+        with np.errstate(invalid="ignore"):
+            result = float(weights @ ((cap1 * growth) ** inv_years - 1 + cap1 * div))
+        if np.isnan(result) or np.isinf(result):
+            return np.nan
+        return result
+
+    out = []
+    for p in tsr_probs:
+        target = _quantile(tsr_s, 1 - p)
+
+        a, b = tol, 1 - tol
+        try:
+            fa, fb = tsr_at(a) - target, tsr_at(b) - target
+            if np.isnan(fa) or np.isnan(fb) or fa * fb > 0:
+                p_in = np.nan
+            else:
+                p_in = brentq(lambda x: tsr_at(x) - target, a, b, xtol=tol)
+        except ValueError:
+            p_in = np.nan
+
+        if np.isnan(p_in):
+            thr_rev = thr_marg = thr_mult = np.full(len(tickers), np.nan)
+        else:
+            thr_rev, thr_marg, thr_mult = thresholds_at(p_in)
+        market_cap = thr_rev * thr_marg * thr_mult - D1
+
+        for i, ticker in enumerate(tickers):
+            out.append({
+                "p_tsr": p,
+                "ticker": ticker,
+                "Revenue": thr_rev[i],
+                "EBITDA Margin": thr_marg[i],
+                "EV/EBITDA": thr_mult[i],
+                "Market Cap": market_cap[i],
+                "Share price": market_cap[i] / S1[i],
+                "TSR": target,
+                "Probability": p_in,
+            })
+
+    return pd.DataFrame(out).set_index(["p_tsr", "ticker"])
@@ -0,0 +1,53 @@
+from dataclasses import dataclass, fields
+
+import numpy as np
+import pandas as pd
+
+# Container field -> reporting column name
+COLUMNS = {
+    "revenue": "Revenue",
+    "ebitda_margin": "EBITDA Margin",
+    "ev_ebitda": "EV/EBITDA",
+    "tsr": "TSR",
+}
+
+
+@dataclass
+class Draws:
+    """
+    Simulation draws held as contiguous 1-D arrays of a single dtype.
+    `tsr` is None until compute_tsr has been run.
+    """
+    revenue: np.ndarray
+    ebitda_margin: np.ndarray
+    ev_ebitda: np.ndarray
+    tsr: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self.revenue)
+
+    @property
+    def dtype(self) -> np.dtype:
+        return self.revenue.dtype
+
+    def arrays(self) -> dict:
+        """Populated arrays keyed by field name."""
+        return {
+            f.name: getattr(self, f.name)
+            for f in fields(self)
+            if getattr(self, f.name) is not None
+        }
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, dtype=None) -> "Draws":
+        """Build from a DataFrame with the reporting column names."""
+        data = {
+            name: np.ascontiguousarray(df[col].to_numpy(), dtype=dtype)
+            for name, col in COLUMNS.items()
+            if col in df.columns
+        }
+        return cls(**data)
+
+    def to_frame(self) -> pd.DataFrame:
+        """DataFrame with the reporting column names; only for output/inspection."""
+        return pd.DataFrame({COLUMNS[name]: a for name, a in self.arrays().items()})
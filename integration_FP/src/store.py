@@ -0,0 +1,126 @@
+import json
+import os
+
+import numpy as np
+from numpy.lib.format import open_memmap
+
+from src.kernels import simulate_tsr
+from src.monte_carlo import simulate
+from src.results import Draws
+from src.tsr import compute_tsr
+
+MANIFEST = "manifest.json"
+
+
+def _seed_record(seed):
+    if isinstance(seed, np.random.SeedSequence):
+        return {"entropy": seed.entropy, "spawn_key": list(seed.spawn_key)}
+    return seed
+
+
+class DrawStore:
+    """
+    Draws kept as one .npy file per array in a directory, with a manifest.json
+    recording how they were generated. Files are opened as memmaps, so any
+    number of processes can attach to the same sample without copying it.
+    The manifest is only written, atomically, once the arrays are flushed, so
+    a store without one is incomplete and cannot be opened.
+    """
+
+    def __init__(self, path: str, draws: Draws, manifest: dict):
+        self.path = path
+        self.draws = draws
+        self.manifest = manifest
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, f"{name}.npy")
+
+    def _allocate(self, name: str, dtype, n: int) -> np.memmap:
+        return open_memmap(self._file(name), mode="w+", dtype=dtype, shape=(n,))
+
+    @classmethod
+    def create(cls, path: str, n: int, dtype=np.float64, **manifest) -> "DrawStore":
+        """
+        Allocate empty driver arrays on disk; fill them with simulate(..., out=store.draws)
+        and flush() to publish the manifest.
+        """
+        os.makedirs(path, exist_ok=True)
+        # A manifest left by an earlier run would describe arrays we are about to overwrite
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            os.remove(os.path.join(path, MANIFEST))
+        store = cls(path, None, dict(manifest, n=n, dtype=np.dtype(dtype).name, tsr=None))
+        store.draws = Draws(**{
+            name: store._allocate(name, dtype, n)
+            for name in ("revenue", "ebitda_margin", "ev_ebitda")
+        })
+        return store
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False) -> "DrawStore":
+        """Attach to an existing store; read-only unless `writable`."""
+        if not os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileNotFoundError(f"No complete draw store at {path} (missing {MANIFEST})")
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+        mode = "r+" if writable else "r"
+        store = cls(path, None, manifest)
+        names = ["revenue", "ebitda_margin", "ev_ebitda"]
+        if manifest.get("tsr") is not None:
+            names.append("tsr")
+        store.draws = Draws(**{name: np.load(store._file(name), mmap_mode=mode) for name in names})
+        return store
+
+    def allocate_tsr(self) -> np.memmap:
+        if self.draws.tsr is None:
+            self.draws.tsr = self._allocate("tsr", self.draws.dtype, len(self.draws))
+        return self.draws.tsr
+
+    def record_tsr(self, base: dict, years: float):
+        """Record the base TSR was computed with and flush everything to disk."""
+        self.manifest["tsr"] = {"base": base, "years": years}
+        self.flush()
+
+    def compute_tsr(self, base: dict, years: float) -> Draws:
+        """Write TSR into the store and record the base it was computed with."""
+        self.allocate_tsr()
+        compute_tsr(self.draws, base, years)
+        self.record_tsr(base, years)
+        return self.draws
+
+    def flush(self):
+        for a in self.draws.arrays().values():
+            if isinstance(a, np.memmap):
+                a.flush()
+        self.save_manifest()
+
+    def save_manifest(self):
+        # Write-then-rename so readers never see a partial manifest
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(self.manifest, f, indent=2, default=float)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+
+
+def simulate_to_store(
+    path: str,
+    company_data: dict,
+    n: int,
+    base: dict,
+    years: float,
+    seed=None,
+    sampler: str = "random",
+    dtype=np.float64,
+    backend: str = "numpy"
+) -> DrawStore:
+    """Run simulate and compute_tsr straight into a new DrawStore at `path`."""
+    store = DrawStore.create(path, n, dtype, company_data=company_data, seed=_seed_record(seed),
+                             sampler=sampler, backend=backend)
+    if backend == "numba":
+        # Draws and TSR come out of the compiled kernel in one pass
+        store.allocate_tsr()
+        simulate_tsr(company_data, base, years, n, seed=seed, backend=backend, out=store.draws)
+        store.record_tsr(base, years)
+        return store
+    simulate(company_data, n, rng=np.random.default_rng(seed), sampler=sampler, out=store.draws)
+    store.compute_tsr(base, years)
+    return store
@@ -1,16 +1,76 @@
 import numpy as np
-import pandas as pd
+from src.results import Draws
+
+BASE_YEAR = 2024
+
+
+def horizon_base(base: dict, year: int) -> tuple[dict, float]:
+    """
+    Return (base, years) for a forecast year measured from BASE_YEAR.
+    End-of-horizon inputs are taken from `net_debt_<year>`, `shares_<year>` and
+    `div_yield_<year>`, which the base must provide for that year.
+    """
+    years = float(year - BASE_YEAR)
+    if years <= 0:
+        raise ValueError(f"Forecast year {year} must be after {BASE_YEAR}")
+    keys = [f"{key}_{year}" for key in ("net_debt", "shares", "div_yield")]
+    missing = [key for key in keys if key not in base]
+    if missing:
+        raise ValueError(f"Base inputs have no {', '.join(missing)} for a {year} horizon")
+    out = dict(base, years=years)
+    for key in ("net_debt", "shares", "div_yield"):
+        out[f"{key}_2026"] = base[f"{key}_{year}"]
+    return out, years
+
+
+def tsr_constants(base: dict, years: float) -> tuple[float, float, float, float]:
+    """
+    (growth, div, D1, 1/years) such that, with cap1 = R1*M1*E1 - D1,
+    TSR = (cap1 * growth) ** (1/years) - 1 + cap1 * div.
+    The five CAGR factors of compute_tsr collapse into that single power.
+    """
+    R0, M0, E0 = base["revenue_2024"], base["ebitda_margin_2024"], base["ev_ebitda_2024"]
+    EV0, D0, S0 = base["ev_2024"], base["net_debt_2024"], base["shares_2024"]
+    Y1, D1, S1 = base["div_yield_2026"], base["net_debt_2026"], base["shares_2026"]
+    cap0 = EV0 - D0
+    return S1 * EV0 / (R0 * M0 * E0 * cap0 * S0), Y1 / S1 / (cap0 / S0), D1, 1 / years
+
+
+def tsr_kernel(R1, M1, E1, base: dict, years: float, out=None):
+    """
+    TSR only, without the intermediate CAGR columns (see tsr_constants).
+    Works on scalars (returned as 0-d arrays) or arrays; results keep the input dtype.
+    """
+    dt = np.result_type(R1, M1, E1)
+    growth, div, D1, inv_years = (dt.type(k) for k in tsr_constants(base, years))
+
+    if out is None:
+        out = np.empty(np.broadcast(R1, M1, E1).shape, dtype=dt)
+    cap1 = np.multiply(R1, M1, out=out)
+    cap1 *= E1
+    cap1 -= D1
+    tsr = np.multiply(cap1, div)
+    np.multiply(cap1, growth, out=cap1)
+    np.power(cap1, inv_years, out=cap1)
+    cap1 += tsr
+    cap1 -= dt.type(1)
+    return cap1
 
 
 def compute_tsr(
-    df: pd.DataFrame,
+    df,
     base: dict,
     years: float
-) -> pd.DataFrame:
+):
     """
     Append CAGR lines and TSR to df.  
     Expects columns ['Revenue','EBITDA Margin','EV/EBITDA'].
+    A Draws container only gets its `tsr` array filled (see tsr_kernel).
     """
+    if isinstance(df, Draws):
+        df.tsr = tsr_kernel(df.revenue, df.ebitda_margin, df.ev_ebitda, base, years, out=df.tsr)
+        return df
+
     # unpack
     R0, M0, E0 = base["revenue_2024"], base["ebitda_margin_2024"], base["ev_ebitda_2024"]
     EV0, D0, S0 = base["ev_2024"], base["net_debt_2024"], base["shares_2024"]
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy.optimize import brentq
+
+from src.goals import find_equal_p
+from src.monte_carlo import simulate
+from src.results import Draws
+from src.tsr import compute_tsr
+
+COMPANY = {
+    "Revenue": {"median": 1766.0, "0th": 1756.243, "100th": 1804.8},
+    "EBITDA_Margin": {"median": 0.2552, "0th": 0.2484, "100th": 0.2670},
+    "EV_EBITDA": {"median": 10.467, "0th": 10.0446, "100th": 10.8245},
+}
+BASE = {
+    "revenue_2024": 1630.0,
+    "ebitda_margin_2024": 0.23,
+    "ev_ebitda_2024": 16.45,
+    "ev_2024": 6164.0,
+    "net_debt_2024": 508.0,
+    "shares_2024": 140.0,
+    "div_yield_2024": 0.02,
+    "net_debt_2026": 370.0,
+    "shares_2026": 139.5833,
+    "div_yield_2026": 0.01,
+    "years": 2.0,
+}
+PROBS = [0.8, 0.5, 0.2]
+
+
+def baseline_find_equal_p(df, base, years, tsr_probs, tol=1e-6):
+    """The original DataFrame implementation: Series.quantile and compute_tsr per step."""
+    rev, marg, mult, tsr_s = df["Revenue"], df["EBITDA Margin"], df["EV/EBITDA"], df["TSR"]
+
+    def tsr_at(p):
+        p = np.clip(p, tol, 1 - tol)
+        row = pd.DataFrame({
+            "Revenue": [rev.quantile(1 - p)],
+            "EBITDA Margin": [marg.quantile(1 - p)],
+            "EV/EBITDA": [mult.quantile(1 - p)],
+        })
+        return compute_tsr(row, base, years)["TSR"].iloc[0]
+
+    out = []
+    for p in tsr_probs:
+        target = tsr_s.quantile(1 - p)
+        p_in = brentq(lambda x: tsr_at(x) - target, tol, 1 - tol, xtol=tol)
+        out.append({"p_tsr": p, "TSR": target, "Probability": p_in,
+                    "Revenue": rev.quantile(1 - p_in)})
+    return pd.DataFrame(out).set_index("p_tsr")
+
+
+def test_draws_match_baseline_dataframe_path():
+    draws = simulate(COMPANY, 20_000, rng=np.random.default_rng(7))
+    df = compute_tsr(draws.to_frame(), BASE, 2.0)
+    draws = compute_tsr(draws, BASE, 2.0)
+
+    np.testing.assert_allclose(draws.tsr, df["TSR"].to_numpy(), rtol=0, atol=1e-12)
+
+    expected = baseline_find_equal_p(df, BASE, 2.0, PROBS)
+    table = find_equal_p(draws, BASE, 2.0, PROBS)
+    for col in expected.columns:
+        np.testing.assert_allclose(table[col], expected[col], rtol=0, atol=1e-9)
+
+
+def test_dataframe_input_matches_draws_input():
+    draws = compute_tsr(simulate(COMPANY, 5_000, rng=np.random.default_rng(3)), BASE, 2.0)
+    pd.testing.assert_frame_equal(
+        find_equal_p(draws.to_frame(), BASE, 2.0, PROBS),
+        find_equal_p(draws, BASE, 2.0, PROBS),
+    )
+
+
+def test_all_nan_draws_give_nan_row():
+    nan = np.full(100, np.nan)
+    draws = Draws(revenue=nan, ebitda_margin=nan, ev_ebitda=nan, tsr=nan)
+    table = find_equal_p(draws, BASE, 2.0, PROBS)
+    assert list(table.index) == PROBS
+    assert table.isna().all().all()
+
+
+def test_out_of_range_probability_is_rejected():
+    draws = compute_tsr(simulate(COMPANY, 1_000, rng=np.random.default_rng(5)), BASE, 2.0)
+    for p in (1.5, -0.1):
+        with pytest.raises(ValueError):
+            find_equal_p(draws, BASE, 2.0, [0.5, p])
@@ -0,0 +1,29 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pytest
+
+from src.kernels import compare_backends, simulate_tsr
+from tests.test_goals import BASE, COMPANY
+
+pytest.importorskip("numba")
+
+
+def _run(fn, *args, **kwargs):
+    # numba's threading layer is not fork-safe, so keep its threads out of the
+    # pytest process that later tests fork worker pools from
+    with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+        return pool.submit(fn, *args, **kwargs).result()
+
+
+def test_numba_backend_matches_numpy_distribution():
+    result = _run(compare_backends, COMPANY, BASE, 2.0, n=200_000, seed=0)
+    assert (result["p_value"] > 0.01).all(), result
+
+
+def test_numba_backend_does_not_depend_on_chunk():
+    a = _run(simulate_tsr, COMPANY, BASE, 2.0, 10_000, seed=3, backend="numba", chunk=1_000)
+    b = _run(simulate_tsr, COMPANY, BASE, 2.0, 10_000, seed=3, backend="numba", chunk=4_096)
+    for name, values in a.arrays().items():
+        np.testing.assert_array_equal(values, b.arrays()[name])
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.paths import compute_path_tsr, find_equal_p_paths, simulate_paths
+from src.tsr import compute_tsr, horizon_base
+from tests.test_goals import BASE, COMPANY
+
+COMPANY_2027 = {
+    "Revenue": {"median": 1850.0, "0th": 1800.0, "100th": 1950.0},
+    "EBITDA_Margin": {"median": 0.26, "0th": 0.25, "100th": 0.28},
+    "EV_EBITDA": {"median": 10.5, "0th": 9.8, "100th": 11.2},
+}
+YEARLY = {2026: COMPANY, 2027: COMPANY_2027}
+PATH_BASE = dict(BASE, net_debt_2027=300.0, shares_2027=139.0, div_yield_2027=0.015)
+
+
+def _triangular_cdf(x, params):
+    left, mode, right = params["0th"], params["median"], params["100th"]
+    return np.where(
+        x < mode,
+        (x - left) ** 2 / ((right - left) * (mode - left)),
+        1 - (right - x) ** 2 / ((right - left) * (right - mode)),
+    )
+
+
+def test_full_persistence_keeps_one_percentile_per_path():
+    paths = simulate_paths(YEARLY, 2_000, rng=np.random.default_rng(1), persistence=1.0)
+    for name, key in (("revenue", "Revenue"), ("ebitda_margin", "EBITDA_Margin"), ("ev_ebitda", "EV_EBITDA")):
+        u = [_triangular_cdf(getattr(paths, name)[t], YEARLY[year][key]) for t, year in enumerate(paths.years)]
+        np.testing.assert_allclose(u[0], u[1], atol=1e-9)
+
+
+def test_horizon_tsr_matches_compute_tsr_with_that_years_base():
+    paths = compute_path_tsr(simulate_paths(YEARLY, 2_000, rng=np.random.default_rng(2)), PATH_BASE)
+    for year in paths.years:
+        year_base, years = horizon_base(PATH_BASE, year)
+        expected = compute_tsr(paths.horizon(year).to_frame().drop(columns="TSR"), year_base, years)["TSR"]
+        np.testing.assert_allclose(paths.horizon(year).tsr, expected.to_numpy(), rtol=1e-12)
+
+    table = find_equal_p_paths(paths, PATH_BASE, [0.8, 0.5, 0.2])
+    assert list(table.index.get_level_values("year").unique()) == [2026, 2027]
+
+
+def test_horizon_without_its_base_inputs_is_rejected():
+    paths = simulate_paths(YEARLY, 100, rng=np.random.default_rng(3))
+    with pytest.raises(ValueError, match="net_debt_2027"):
+        compute_path_tsr(paths, BASE)
+
+
+def test_missing_year_stats_are_rejected():
+    nan = {"median": np.nan, "0th": np.nan, "100th": np.nan}
+    with pytest.raises(ValueError, match="2027"):
+        simulate_paths({2026: COMPANY, 2027: dict(COMPANY_2027, Revenue=nan)}, 100)
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+
+from src.goals import find_equal_p
+from src.kernels import simulate_tsr
+from src.portfolio import find_equal_p_portfolio, simulate_portfolio_tsr
+from tests.test_goals import BASE, COMPANY, PROBS
+
+COMPANY_B = {
+    "Revenue": {"median": 900.0, "0th": 850.0, "100th": 980.0},
+    "EBITDA_Margin": {"median": 0.31, "0th": 0.29, "100th": 0.34},
+    "EV_EBITDA": {"median": 12.0, "0th": 11.0, "100th": 13.5},
+}
+BASE_B = dict(BASE, revenue_2024=820.0, ebitda_margin_2024=0.3, ev_ebitda_2024=11.5, ev_2024=2830.0,
+              net_debt_2024=200.0, shares_2024=80.0, net_debt_2026=150.0, shares_2026=79.0)
+CONSTITUENTS = [(COMPANY, BASE, 2.0), (COMPANY_B, BASE_B, 2.0)]
+
+
+def test_chunked_result_does_not_depend_on_workers():
+    kwargs = dict(n=10_000, seed=4, correlation=0.3, chunk=1_000)
+    serial = simulate_portfolio_tsr(CONSTITUENTS, [0.6, 0.4], workers=1, **kwargs)
+    parallel = simulate_portfolio_tsr(CONSTITUENTS, [0.6, 0.4], workers=2, **kwargs)
+    np.testing.assert_array_equal(serial, parallel)
+
+
+def test_single_name_matches_find_equal_p():
+    one = [CONSTITUENTS[0]]
+    # At correlation=1 a duplicated name follows the common factor exactly
+    single = simulate_portfolio_tsr(one, [1.0], 200_000, seed=5, correlation=1.0)
+    np.testing.assert_allclose(single, simulate_portfolio_tsr(one * 2, [1.0, 1.0], 200_000, seed=5, correlation=1.0))
+
+    table = find_equal_p_portfolio(single, one, [1.0], PROBS, tickers=["A"]).xs("A", level="ticker")
+    draws = simulate_tsr(COMPANY, BASE, 2.0, 200_000, seed=5, backend="numpy")
+    expected = find_equal_p(draws, BASE, 2.0, PROBS)
+    for col in ("Revenue", "EBITDA Margin", "EV/EBITDA", "Market Cap", "Share price", "TSR"):
+        np.testing.assert_allclose(table[col], expected[col], rtol=1e-3)
+    np.testing.assert_allclose(table["Probability"], expected["Probability"], atol=0.01)
+
+
+@pytest.mark.parametrize("weights", [[0.0, 0.0], [1.0, -1.0], [np.nan, 1.0], [np.inf, 1.0]])
+def test_invalid_weights_are_rejected(weights):
+    with pytest.raises(ValueError):
+        simulate_portfolio_tsr(CONSTITUENTS, weights, 100)
+    with pytest.raises(ValueError):
+        find_equal_p_portfolio(np.zeros(100), CONSTITUENTS, weights, PROBS)
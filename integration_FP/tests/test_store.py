@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+
+from src.results import Draws
+from src.store import DrawStore, simulate_to_store
+from src.tsr import compute_tsr
+from tests.test_goals import BASE, COMPANY
+
+
+def test_store_round_trip(tmp_path):
+    path = str(tmp_path / "store")
+    simulate_to_store(path, COMPANY, 5_000, BASE, 2.0, seed=11, dtype=np.float32)
+
+    store = DrawStore.open(path)
+    for values in store.draws.arrays().values():
+        assert isinstance(values, np.memmap)
+        assert values.dtype == np.float32
+    assert store.manifest["seed"] == 11
+    assert store.manifest["n"] == 5_000
+
+    expected = compute_tsr(Draws(revenue=np.array(store.draws.revenue),
+                                 ebitda_margin=np.array(store.draws.ebitda_margin),
+                                 ev_ebitda=np.array(store.draws.ev_ebitda)), BASE, 2.0)
+    np.testing.assert_array_equal(store.draws.tsr, expected.tsr)
+
+
+def test_open_without_manifest_fails(tmp_path):
+    path = str(tmp_path / "store")
+    DrawStore.create(path, 100)
+    with pytest.raises(FileNotFoundError):
+        DrawStore.open(path)